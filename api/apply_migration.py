@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
-"""Apply database migration to add watched/starred columns.
+"""Apply database migrations to the downloadjob table.
 
-This script safely adds the watched and starred columns to the downloadjob table.
-It can be run multiple times safely - it will skip if columns already exist.
+This script safely adds the watched and starred columns and the indexes the
+API relies on, and converts JSON file manifests to newline-separated text. It can be run multiple times safely - it will skip columns and
+indexes that already exist.
 """
 
 import sqlite3
@@ -27,24 +28,60 @@ def get_db_path() -> Path:
     return Path("storage.db").resolve()
 
 
-def column_exists(cursor: sqlite3.Cursor, table: str, column: str) -> bool:
-    """Check if a column exists in a table."""
-    cursor.execute(f"PRAGMA table_info({table})")
-    columns = [row[1] for row in cursor.fetchall()]
-    return column in columns
+# Columns added on top of the original schema, in the order they are applied.
+COLUMNS: tuple[tuple[str, str], ...] = (
+    ("watched", "BOOLEAN NOT NULL DEFAULT 0"),
+    ("starred", "BOOLEAN NOT NULL DEFAULT 0"),
+)
+
+# Indexes are created after every column exists so each B-tree is built in a
+# single sorted pass over the populated table.
+INDEXES: tuple[tuple[str, str], ...] = (
+    ("ix_downloadjob_watched", "downloadjob (watched)"),
+    ("ix_downloadjob_created_at", "downloadjob (created_at DESC)"),
+    ("ix_downloadjob_status_created", "downloadjob (status, created_at DESC)"),
+    (
+        "ix_downloadjob_starred_partial",
+        "downloadjob (created_at DESC) WHERE starred = 1",
+    ),
+)
+
+UNIQUE_INDEXES: tuple[tuple[str, str], ...] = (
+    ("ix_downloadjob_source_url_unique", "downloadjob (source_url)"),
+)
+
+# Indexes superseded by the ones above.
+DROPPED_INDEXES: tuple[str, ...] = (
+    "ix_downloadjob_starred",
+    "ix_downloadjob_source_url",
+)
+
+
+# Converts manifests still stored as JSON arrays to newline-separated paths.
+# Already converted values are not valid JSON arrays, so this is idempotent.
+MANIFEST_TO_TEXT = """
+UPDATE downloadjob
+SET file_manifest = COALESCE(
+    (
+        SELECT group_concat(value, char(10))
+        FROM (SELECT value FROM json_each(downloadjob.file_manifest) ORDER BY key)
+    ),
+    ''
+)
+WHERE json_valid(file_manifest) AND json_type(file_manifest) IN ('array', 'null')
+"""
 
 
-def index_exists(cursor: sqlite3.Cursor, index_name: str) -> bool:
-    """Check if an index exists."""
+def find_duplicate_urls(cursor: sqlite3.Cursor) -> list[str]:
+    """Return source URLs that appear on more than one job."""
     cursor.execute(
-        "SELECT name FROM sqlite_master WHERE type='index' AND name=?",
-        (index_name,)
+        "SELECT source_url FROM downloadjob GROUP BY source_url HAVING COUNT(*) > 1"
     )
-    return cursor.fetchone() is not None
+    return [row[0] for row in cursor.fetchall()]
 
 
 def apply_migration(db_path: Path) -> None:
-    """Apply the migration to add watched and starred columns."""
+    """Apply the missing columns and indexes to the downloadjob table."""
     if not db_path.exists():
         print(f"Error: Database file not found at {db_path}")
         sys.exit(1)
@@ -57,47 +94,68 @@ def apply_migration(db_path: Path) -> None:
     try:
         changes_made = False
 
-        # Check if columns already exist
-        watched_exists = column_exists(cursor, "downloadjob", "watched")
-        starred_exists = column_exists(cursor, "downloadjob", "starred")
-
-        # Add watched column if it doesn't exist
-        if not watched_exists:
-            print("Adding 'watched' column...")
-            cursor.execute(
-                "ALTER TABLE downloadjob ADD COLUMN watched BOOLEAN NOT NULL DEFAULT 0"
-            )
-            cursor.execute("CREATE INDEX ix_downloadjob_watched ON downloadjob (watched)")
-            print("✓ Added 'watched' column with index")
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("PRAGMA table_info(downloadjob)")
+        existing_columns = {row[1] for row in cursor.fetchall()}
+
+        for name, definition in COLUMNS:
+            if name in existing_columns:
+                print(f"✓ Column '{name}' already exists")
+                continue
+            print(f"Adding '{name}' column...")
+            cursor.execute(f"ALTER TABLE downloadjob ADD COLUMN {name} {definition}")
+            print(f"✓ Added '{name}' column")
             changes_made = True
-        else:
-            print("✓ Column 'watched' already exists")
-
-        # Add starred column if it doesn't exist
-        if not starred_exists:
-            print("Adding 'starred' column...")
-            cursor.execute(
-                "ALTER TABLE downloadjob ADD COLUMN starred BOOLEAN NOT NULL DEFAULT 0"
-            )
-            cursor.execute("CREATE INDEX ix_downloadjob_starred ON downloadjob (starred)")
-            print("✓ Added 'starred' column with index")
+
+        cursor.execute(MANIFEST_TO_TEXT)
+        if cursor.rowcount > 0:
+            print(f"✓ Converted {cursor.rowcount} file manifests to text")
             changes_made = True
         else:
-            print("✓ Column 'starred' already exists")
-
-        # Add source_url index if it doesn't exist
-        source_url_index_exists = index_exists(cursor, "ix_downloadjob_source_url")
-        if not source_url_index_exists:
-            print("Adding index on 'source_url' for duplicate detection...")
-            cursor.execute(
-                "CREATE INDEX ix_downloadjob_source_url ON downloadjob (source_url)"
-            )
-            print("✓ Added 'source_url' index")
+            print("✓ File manifests already stored as text")
+
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='downloadjob'"
+        )
+        existing_indexes = {row[0] for row in cursor.fetchall()}
+
+        missing_unique = [
+            name for name, _ in UNIQUE_INDEXES if name not in existing_indexes
+        ]
+        if missing_unique:
+            duplicates = find_duplicate_urls(cursor)
+            if duplicates:
+                raise RuntimeError(
+                    "remove duplicate jobs before adding the unique source_url index: "
+                    + ", ".join(duplicates)
+                )
+
+        for name in DROPPED_INDEXES:
+            if name in existing_indexes:
+                cursor.execute(f"DROP INDEX IF EXISTS {name}")
+                print(f"✓ Dropped superseded index '{name}'")
+                changes_made = True
+
+        statements = [
+            (name, f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+            for name, target in INDEXES
+        ] + [
+            (name, f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {target}")
+            for name, target in UNIQUE_INDEXES
+        ]
+        for name, statement in statements:
+            if name in existing_indexes:
+                print(f"✓ Index '{name}' already exists")
+                continue
+            cursor.execute(statement)
+            print(f"✓ Added index '{name}'")
             changes_made = True
-        else:
-            print("✓ Index 'ix_downloadjob_source_url' already exists")
 
         conn.commit()
+        # Refresh planner statistics so queries pick up the new indexes.
+        if changes_made:
+            cursor.execute("ANALYZE downloadjob")
+        cursor.execute("PRAGMA optimize")
 
         if changes_made:
             print("\n✅ Migration completed successfully!")
@@ -1,8 +1,10 @@
 """Core package for the Avarr downloader service."""
 
+from functools import lru_cache
 from importlib.metadata import version, PackageNotFoundError
 
 
+@lru_cache(maxsize=1)
 def get_version() -> str:
     """Return the installed package version or a dev placeholder."""
 
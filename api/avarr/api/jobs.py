@@ -3,21 +3,49 @@
 from __future__ import annotations
 
 import logging
+import os
 import shutil
+from datetime import datetime
 from pathlib import Path
-
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from typing import Any
+from urllib.parse import urlsplit
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
+from sqlalchemy import tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 
 from ..database import session_dependency
-from ..download_manager import DownloadManager, is_url_allowed
-from ..models import DownloadJob, JobCreate, JobDeleteResponse, JobRead, JobStatus, JobUpdateFlags
+from ..download_manager import DownloadManager, is_host_allowed
+from ..models import (
+    DownloadJob,
+    JobCreate,
+    JobDeleteResponse,
+    JobRead,
+    JobStatus,
+    JobUpdateFlags,
+    now_utc,
+)
 from ..settings import get_settings
+from .routing import ORJSONRoute
 
 
-router = APIRouter(prefix="/jobs", tags=["jobs"])
+router = APIRouter(prefix="/jobs", tags=["jobs"], route_class=ORJSONRoute)
 logger = logging.getLogger(__name__)
 settings = get_settings()
+_DOWNLOAD_ROOT = str(settings.download_root.resolve())
+_DOWNLOAD_PREFIX = os.path.join(_DOWNLOAD_ROOT, "")
+
+# Columns backing JobRead, in field order for JobRead.from_job_tuple.
+_JOB_READ_COLUMNS = tuple(getattr(DownloadJob, name) for name in JobRead.model_fields)
 
 
 def _get_manager(request: Request) -> DownloadManager:
@@ -30,41 +58,67 @@ def _resolve_download_path(relative_path: str) -> Path | None:
         return None
     # Prevent absolute paths from escaping the download root.
     relative = relative.lstrip("/\\")
-    candidate = (settings.download_root / relative).resolve(strict=False)
-    try:
-        candidate.relative_to(settings.download_root)
-    except ValueError:
+    joined = os.path.join(_DOWNLOAD_ROOT, relative)
+    # normpath is pure string work; realpath stats every component.
+    if settings.follow_symlinks:
+        candidate = os.path.realpath(joined)
+    else:
+        candidate = os.path.normpath(joined)
+    if not candidate.startswith(_DOWNLOAD_PREFIX):
         logger.warning("Refusing to delete path outside download root: %s", candidate)
         return None
-    return candidate
+    return Path(candidate)
 
 
-def _cleanup_job_artifacts(job: DownloadJob) -> None:
-    if job.output_dir:
-        directory = _resolve_download_path(job.output_dir)
-        if directory and directory.exists():
+def _remove_job_files(output_dir: str | None, manifest: list[str]) -> None:
+    output_prefix = None
+    if output_dir:
+        directory = _resolve_download_path(output_dir)
+        if directory:
             try:
                 shutil.rmtree(directory)
             except FileNotFoundError:
                 pass
-
-    output_prefix = None
-    if job.output_dir:
-        normalized = job.output_dir.rstrip("/\\")
+        normalized = output_dir.rstrip("/\\")
         output_prefix = f"{normalized}/"
 
-    for relative_path in job.file_manifest:
+    for relative_path in manifest:
         if not relative_path:
             continue
         if output_prefix and relative_path.startswith(output_prefix):
             # Already deleted as part of the directory removal above.
             continue
         file_path = _resolve_download_path(relative_path)
-        if file_path and file_path.exists():
-            try:
-                file_path.unlink()
-            except FileNotFoundError:
-                continue
+        if file_path:
+            file_path.unlink(missing_ok=True)
+
+
+def _cleanup_job_artifacts(job_id: str, output_dir: str | None, manifest: list[str]) -> None:
+    """Delete a removed job's files; runs after the response has been sent."""
+
+    try:
+        _remove_job_files(output_dir, manifest)
+    except OSError:
+        logger.exception("Failed to delete files for job %s", job_id)
+
+
+def _keyset_cursor(before_created_at: datetime | None, before_id: str | None) -> Any:
+    """Filter for jobs listed after the given (created_at, id) position.
+
+    Unlike an offset, the cursor does not shift when new jobs are inserted
+    between page requests.
+    """
+
+    if before_created_at is None and before_id is None:
+        return None
+    if before_created_at is None or before_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="before_created_at and before_id must be given together",
+        )
+    return tuple_(DownloadJob.created_at, DownloadJob.id) < tuple_(
+        before_created_at, before_id
+    )
 
 
 @router.get("/", response_model=list[JobRead])
@@ -72,17 +126,25 @@ def list_jobs(
     status: JobStatus | None = None,
     watched: bool | None = None,
     starred: bool | None = None,
+    limit: int = Query(100, ge=1, le=500),
+    before_created_at: datetime | None = None,
+    before_id: str | None = None,
     session: Session = Depends(session_dependency),
 ) -> list[JobRead]:
-    statement = select(DownloadJob).order_by(DownloadJob.created_at.desc())
+    statement = select(*_JOB_READ_COLUMNS).order_by(
+        DownloadJob.created_at.desc(), DownloadJob.id.desc()
+    )
+    cursor = _keyset_cursor(before_created_at, before_id)
+    if cursor is not None:
+        statement = statement.where(cursor)
     if status:
         statement = statement.where(DownloadJob.status == status)
     if watched is not None:
         statement = statement.where(DownloadJob.watched == watched)
     if starred is not None:
         statement = statement.where(DownloadJob.starred == starred)
-    jobs = session.exec(statement).all()
-    return [JobRead.from_orm(job) for job in jobs]
+    rows = session.exec(statement.limit(limit)).all()
+    return [JobRead.from_job_tuple(row) for row in rows]
 
 
 @router.get("/{job_id}", response_model=JobRead)
@@ -99,29 +161,34 @@ def update_job_flags(
     payload: JobUpdateFlags,
     session: Session = Depends(session_dependency)
 ) -> JobRead:
-    job = session.get(DownloadJob, job_id)
-    if not job:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
-
+    values: dict[str, Any] = {}
     # If starring a job, automatically mark it as watched
     if payload.starred is True:
-        job.starred = True
-        job.watched = True
+        values["starred"] = True
+        values["watched"] = True
     elif payload.starred is False:
-        job.starred = False
+        values["starred"] = False
         # Don't automatically unwatch when unstarring
         if payload.watched is not None:
-            job.watched = payload.watched
+            values["watched"] = payload.watched
     else:
         # Only starred field not provided, update watched if specified
         if payload.watched is not None:
-            job.watched = payload.watched
-
-    job.touch()
+            values["watched"] = payload.watched
+    values["updated_at"] = now_utc()
+
+    statement = (
+        update(DownloadJob)
+        .where(DownloadJob.id == job_id)
+        .values(**values)
+        .returning(*_JOB_READ_COLUMNS)
+    )
+    row = session.execute(statement).one_or_none()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
     session.commit()
-    session.refresh(job)
 
-    return JobRead.from_orm(job)
+    return JobRead.model_validate(row._mapping)
 
 
 @router.get("/{job_id}/files", response_model=list[str])
@@ -133,7 +200,11 @@ def list_job_files(job_id: str, session: Session = Depends(session_dependency))
 
 
 @router.delete("/{job_id}", response_model=JobDeleteResponse)
-def delete_job(job_id: str, session: Session = Depends(session_dependency)) -> JobDeleteResponse:
+def delete_job(
+    job_id: str,
+    background_tasks: BackgroundTasks,
+    session: Session = Depends(session_dependency),
+) -> JobDeleteResponse:
     job = session.get(DownloadJob, job_id)
     if not job:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
@@ -144,16 +215,12 @@ def delete_job(job_id: str, session: Session = Depends(session_dependency)) -> J
         )
 
     source_url = job.source_url
-    try:
-        _cleanup_job_artifacts(job)
-    except OSError as exc:  # pragma: no cover - error branch
-        logger.exception("Failed to delete files for job %s", job_id)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to delete download files: {exc}",
-        ) from exc
+    output_dir = job.output_dir
+    manifest = list(job.file_manifest)
 
     session.delete(job)
+    session.commit()
+    background_tasks.add_task(_cleanup_job_artifacts, job_id, output_dir, manifest)
     return JobDeleteResponse(id=job_id, source_url=source_url)
 
 
@@ -164,27 +231,28 @@ async def create_job(
     session: Session = Depends(session_dependency),
 ) -> JobRead:
     url = payload.url.strip()
-    if not is_url_allowed(url):
+    if not is_host_allowed(urlsplit(url).hostname):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="URL domain is not allowed by server policy",
         )
 
-    # Check for duplicate URL
-    existing_job = session.exec(
-        select(DownloadJob).where(DownloadJob.source_url == url)
-    ).first()
-    if existing_job:
+    job = DownloadJob(source_url=url, telegram_chat_id=payload.telegram_chat_id)
+    session.add(job)
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        existing_job = session.exec(
+            select(DownloadJob).where(DownloadJob.source_url == url)
+        ).first()
+        if existing_job is None:
+            raise
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Job already exists for this URL (ID: {existing_job.id})",
         )
 
-    job = DownloadJob(source_url=url, telegram_chat_id=payload.telegram_chat_id)
-    session.add(job)
-    session.commit()
-    session.refresh(job)
-
     manager = _get_manager(request)
     await manager.enqueue_job(job.id)
 
@@ -2,18 +2,23 @@
 
 from __future__ import annotations
 
+import hmac
 from typing import Any, Dict
+from urllib.parse import urlsplit
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlmodel import Session
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
 
 from ..database import session_dependency
-from ..download_manager import DownloadManager, is_url_allowed
+from ..download_manager import DownloadManager, is_host_allowed
 from ..models import DownloadJob
 from ..settings import get_settings
+from .routing import ORJSONRoute
 
 
-router = APIRouter(prefix="/telegram", tags=["telegram"])
+router = APIRouter(prefix="/telegram", tags=["telegram"], route_class=ORJSONRoute)
 settings = get_settings()
 
 
@@ -21,13 +26,28 @@ def _get_manager(request: Request) -> DownloadManager:
     return request.app.state.manager
 
 
-def _extract_url(update: Dict[str, Any]) -> tuple[str | None, int | None]:
-    message = update.get("message") or update.get("channel_post")
+class TelegramChat(BaseModel):
+    id: int
+
+
+class TelegramMessage(BaseModel):
+    text: str | None = None
+    chat: TelegramChat | None = None
+
+
+class TelegramUpdate(BaseModel):
+    """Subset of a Telegram update; unknown fields are ignored."""
+
+    message: TelegramMessage | None = None
+    channel_post: TelegramMessage | None = None
+
+
+def _extract_url(update: TelegramUpdate) -> tuple[str | None, int | None]:
+    message = update.message or update.channel_post
     if not message:
         return None, None
-    text = (message.get("text") or "").strip()
-    chat = message.get("chat") or {}
-    chat_id = chat.get("id")
+    text = (message.text or "").strip()
+    chat_id = message.chat.id if message.chat else None
     if not text:
         return None, chat_id
     return text.split()[0], chat_id
@@ -35,30 +55,42 @@ def _extract_url(update: Dict[str, Any]) -> tuple[str | None, int | None]:
 
 @router.post("/webhook", status_code=status.HTTP_202_ACCEPTED)
 async def telegram_webhook(
-    update: Dict[str, Any],
+    update: TelegramUpdate,
     request: Request,
     session: Session = Depends(session_dependency),
 ) -> Dict[str, Any]:
-    secret = request.headers.get("X-Telegram-Bot-Api-Secret-Token")
-    if settings.telegram_webhook_secret and secret != settings.telegram_webhook_secret:
+    secret = request.headers.get("X-Telegram-Bot-Api-Secret-Token") or ""
+    expected = settings.telegram_webhook_secret
+    if expected and not hmac.compare_digest(secret.encode(), expected.encode()):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook secret")
 
     url, chat_id = _extract_url(update)
     if not url or not chat_id:
         return {"ok": True}
 
-    if not is_url_allowed(url):
-        notifier = request.app.state.notifier
+    notifier = request.app.state.notifier
+    if not is_host_allowed(urlsplit(url).hostname):
         if notifier.bot_token:
             await notifier.send_message(chat_id, "URL blocked by server policy")
         return {"ok": True}
 
     job = DownloadJob(source_url=url, telegram_chat_id=chat_id)
     session.add(job)
-    session.commit()
-    session.refresh(job)
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        existing_job = session.exec(
+            select(DownloadJob).where(DownloadJob.source_url == url)
+        ).first()
+        if existing_job is None:
+            raise
+        if notifier.bot_token:
+            await notifier.send_message(
+                chat_id, f"Download request already exists {existing_job.id}"
+            )
+        return {"ok": True, "job_id": existing_job.id}
 
-    notifier = request.app.state.notifier
     if notifier.bot_token:
         await notifier.send_message(chat_id, f"Queued download request {job.id}")
 
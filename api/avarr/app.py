@@ -2,17 +2,21 @@
 
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from .api import router as api_router
-from .database import init_db
+from .database import init_db, optimize_db
 from .download_manager import DownloadManager
 from .notifier import TelegramNotifier
 from .settings import get_settings
+from .static import AccelRedirectStaticFiles, SPAStaticFiles
 from . import get_version
 
 
@@ -23,7 +27,21 @@ def create_app() -> FastAPI:
     notifier = TelegramNotifier(settings.telegram_bot_token)
     manager = DownloadManager(notifier)
 
-    app = FastAPI(title="Avarr Downloader", version=get_version())
+    @asynccontextmanager
+    async def lifespan(_app: FastAPI) -> AsyncIterator[None]:  # pragma: no cover
+        await manager.start()
+        try:
+            yield
+        finally:
+            await manager.stop()
+            optimize_db()
+
+    app = FastAPI(
+        title="Avarr Downloader",
+        version=get_version(),
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
+    )
 
     app.state.manager = manager
     app.state.notifier = notifier
@@ -41,14 +59,6 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    @app.on_event("startup")
-    async def _startup() -> None:  # pragma: no cover - framework hook
-        await manager.start()
-
-    @app.on_event("shutdown")
-    async def _shutdown() -> None:  # pragma: no cover - framework hook
-        await manager.stop()
-
     @app.get("/healthz")
     async def healthz() -> dict[str, str]:  # pragma: no cover - trivial endpoint
         return {"status": "ok"}
@@ -56,12 +66,19 @@ def create_app() -> FastAPI:
     app.include_router(api_router)
 
     downloads_dir = settings.download_root.resolve()
-    if downloads_dir.exists():
-        app.mount("/downloads", StaticFiles(directory=downloads_dir), name="downloads")
+    if settings.serve_downloads_directly and downloads_dir.exists():
+        if settings.downloads_accel_redirect:
+            downloads_app = AccelRedirectStaticFiles(
+                directory=downloads_dir,
+                redirect_prefix=settings.downloads_accel_redirect,
+            )
+        else:
+            downloads_app = StaticFiles(directory=downloads_dir)
+        app.mount("/downloads", downloads_app, name="downloads")
 
     webui_dir = Path("webui/dist")
     if webui_dir.exists():
-        app.mount("/", StaticFiles(directory=webui_dir, html=True), name="webui")
+        app.mount("/", SPAStaticFiles(directory=webui_dir, html=True), name="webui")
 
     return app
 
@@ -5,8 +5,12 @@ from __future__ import annotations
 from contextlib import contextmanager
 from typing import Iterator
 
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
 from sqlmodel import Session, SQLModel, create_engine
 
+from .models import DownloadJob
 from .settings import get_settings
 
 
@@ -15,19 +19,74 @@ settings = get_settings()
 
 connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
 engine = create_engine(settings.database_url, connect_args=connect_args)
+SessionLocal = sessionmaker(
+    bind=engine, class_=Session, expire_on_commit=False, autoflush=False
+)
+
+
+# Applied to every new SQLite connection. WAL keeps readers from blocking
+# behind the download workers' writes; the rest keeps hot pages in memory.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA foreign_keys=ON",
+)
+
+
+def _sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _sqlite_pragmas)
 
 
 def init_db() -> None:
     """Create all tables if they do not yet exist."""
 
     SQLModel.metadata.create_all(engine)
+    _ensure_unique_indexes()
+
+
+def _ensure_unique_indexes() -> None:
+    """Add unique indexes that create_all skips on an existing table.
+
+    Job creation relies on the unique source_url index to reject duplicate
+    URLs, so refuse to start without it rather than accept duplicates.
+    """
+
+    for index in DownloadJob.__table__.indexes:
+        if not index.unique:
+            continue
+        try:
+            index.create(engine, checkfirst=True)
+        except IntegrityError as exc:
+            raise RuntimeError(
+                f"Cannot create unique index {index.name}: the database holds "
+                "duplicate jobs. Run apply_migration.py to list them."
+            ) from exc
+
+
+def optimize_db() -> None:
+    """Let SQLite refresh query planner statistics if they are stale."""
+
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect() as connection:
+        connection.exec_driver_sql("PRAGMA optimize")
 
 
 @contextmanager
 def get_session() -> Iterator[Session]:
     """Yield a SQLModel session with automatic close/rollback handling."""
 
-    session = Session(engine, expire_on_commit=False)
+    session = SessionLocal()
     try:
         yield session
         session.commit()
@@ -39,10 +98,20 @@ def get_session() -> Iterator[Session]:
 
 
 def session_dependency() -> Iterator[Session]:
-    """FastAPI dependency wrapper used inside request handlers."""
+    """FastAPI dependency yielding a session; handlers commit their own writes."""
 
-    with get_session() as session:
+    session = SessionLocal()
+    try:
         yield session
+    finally:
+        session.close()
 
 
-__all__ = ["engine", "get_session", "init_db", "session_dependency"]
+__all__ = [
+    "SessionLocal",
+    "engine",
+    "get_session",
+    "init_db",
+    "optimize_db",
+    "session_dependency",
+]
@@ -3,35 +3,49 @@
 from __future__ import annotations
 
 import asyncio
-import base64
+import binascii
 import json
 import logging
+import os
 import re
 import shutil
+import string
+import threading
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from datetime import date, datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-from urllib.parse import urlparse
+from typing import Any, Dict, List, Optional, Set
 
 from yt_dlp import YoutubeDL
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import defer
 from sqlmodel import select
 
 from .database import get_session
-from .models import DownloadJob, JobStatus
+from .models import DownloadJob, JobStatus, now_utc
 from .notifier import TelegramNotifier
 from .settings import get_settings
 from .transcoder import TranscodeService
 
 logger = logging.getLogger(__name__)
 
+# The manifest can hold thousands of paths; status, progress and notifier
+# lookups never read it, so skip loading and decoding it there.
+_SKIP_MANIFEST = (defer(DownloadJob.file_manifest),)
 
-def _json_default(value: Any) -> str:
+
+def _json_default(value: Any) -> Any:
     """Serialize otherwise unsupported objects when persisting metadata."""
 
-    if isinstance(value, bytes):
+    if isinstance(value, (bytes, bytearray)):
         # Preserve the raw payload while keeping the metadata readable.
-        return base64.b64encode(value).decode("ascii")
+        return binascii.b2a_base64(value, newline=False).decode("ascii")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
     # Fallback to the object's string representation so yt-dlp helper classes
     # (e.g. FFmpegFixupM3u8PP) do not break metadata dumps.
     return str(value)
@@ -40,43 +54,57 @@ def _json_default(value: Any) -> str:
 def _dedupe_thumbnails(payload: Any) -> None:
     """Remove duplicate thumbnail entries in-place throughout metadata."""
 
-    def _walk(node: Any) -> None:
+    # Iterative walk: playlist metadata can nest deeper than the recursion
+    # limit, and shared sub-trees only need to be visited once.
+    stack: list[Any] = [payload] if isinstance(payload, (dict, list)) else []
+    visited: set[int] = set()
+    while stack:
+        node = stack.pop()
+        if id(node) in visited:
+            continue
+        visited.add(id(node))
         if isinstance(node, dict):
             thumbnails = node.get("thumbnails")
             if isinstance(thumbnails, list):
-                seen: set[tuple[Any, Any]] = set()
-                deduped: list[Any] = []
+                unique: dict[tuple[Any, Any], Any] = {}
                 for entry in thumbnails:
                     if isinstance(entry, dict):
                         key = (entry.get("id"), entry.get("url"))
                     else:
                         key = (None, entry)
-                    if key in seen:
-                        continue
-                    seen.add(key)
-                    deduped.append(entry)
-                node["thumbnails"] = deduped
-            for value in node.values():
-                _walk(value)
-        elif isinstance(node, list):
-            for item in node:
-                _walk(item)
+                    unique.setdefault(key, entry)
+                node["thumbnails"] = list(unique.values())
+            children = node.values()
+        else:
+            children = node
+        stack.extend(child for child in children if isinstance(child, (dict, list)))
 
-    _walk(payload)
 
+# Runs of whitespace and other disallowed characters collapse to one "_".
+_SANITIZE_PATTERN = re.compile(r"[^\w().-]+", re.UNICODE)
 
-_SANITIZE_PATTERN = re.compile(r"[^\w\s().-]", re.UNICODE)
+# ASCII equivalent of _SANITIZE_PATTERN: every disallowed byte becomes a
+# space, so bytes.split() drops and collapses the same runs in C.
+_ASCII_ALLOWED = frozenset((string.ascii_letters + string.digits + "_().-").encode())
+_ASCII_SANITIZE_TABLE = bytes(
+    byte if byte in _ASCII_ALLOWED else ord(" ") for byte in range(256)
+)
 
 
 def _sanitize_directory_name(title: str) -> Optional[str]:
     """Return a filesystem-friendly directory name based on a title."""
 
-    normalized = unicodedata.normalize("NFKC", title).strip()
-    if not normalized:
-        return None
-    sanitized = _SANITIZE_PATTERN.sub("_", normalized)
-    sanitized = re.sub(r"\s+", "_", sanitized)
-    sanitized = sanitized.strip("._-")
+    if title.isascii():
+        # ASCII is already NFKC-normal.
+        words = title.encode("ascii").translate(_ASCII_SANITIZE_TABLE).split()
+        sanitized = b"_".join(words).decode("ascii").strip("._-")
+    else:
+        # The quick check avoids rebuilding titles that need no normalization.
+        if unicodedata.is_normalized("NFKC", title):
+            normalized = title
+        else:
+            normalized = unicodedata.normalize("NFKC", title)
+        sanitized = _SANITIZE_PATTERN.sub("_", normalized).strip("._-")
     if not sanitized:
         return None
     return sanitized[:120]
@@ -99,25 +127,38 @@ class DownloadResult:
 
 
 class DownloadManager:
-    """Multi-worker queue that processes yt-dlp downloads concurrently."""
+    """Queue that runs up to ``max_concurrent_downloads`` yt-dlp jobs at once."""
 
     def __init__(self, notifier: TelegramNotifier) -> None:
         self.settings = get_settings()
         self.notifier = notifier
         self.queue: asyncio.Queue[str] = asyncio.Queue()
-        self._worker_tasks: List[asyncio.Task[None]] = []
+        self._dispatcher: Optional[asyncio.Task[None]] = None
+        self._job_tasks: Set[asyncio.Task[None]] = set()
+        self._slots = asyncio.Semaphore(self.settings.max_concurrent_downloads)
+        # yt-dlp blocks, so every download slot needs its own thread; the
+        # loop's default executor is shared and may be smaller than the limit.
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._ydl_local = threading.local()
         self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._progress_checkpoints: Dict[str, float] = {}
-        self._shutdown_event = asyncio.Event()
+        # Latest percentage per job, written to the database by
+        # _flush_progress_loop instead of on every yt-dlp tick.
+        self._pending_progress: Dict[str, float] = {}
+        self._progress_lock = threading.Lock()
+        self._progress_flusher: Optional[asyncio.Task[None]] = None
         self.transcoder = TranscodeService(
             self.settings.download_root, max_workers=self.settings.transcode_workers
         )
 
     async def start(self) -> None:
-        if self._worker_tasks:
+        if self._dispatcher is not None:
             return
         self._loop = asyncio.get_running_loop()
-        self._shutdown_event.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.settings.max_concurrent_downloads,
+            thread_name_prefix="download",
+        )
         await self.notifier.start()
         resumed_jobs = self._recover_incomplete_jobs()
         for job_id in resumed_jobs:
@@ -125,48 +166,59 @@ class DownloadManager:
         if resumed_jobs:
             logger.info("Requeued %d incomplete jobs", len(resumed_jobs))
         self._schedule_transcode_backlog()
-        num_workers = self.settings.max_concurrent_downloads
-        for worker_id in range(num_workers):
-            task = asyncio.create_task(self._worker(worker_id))
-            self._worker_tasks.append(task)
-        logger.info("Download manager started with %d workers", num_workers)
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        self._progress_flusher = asyncio.create_task(self._flush_progress_loop())
+        logger.info(
+            "Download manager started with %d download slots",
+            self.settings.max_concurrent_downloads,
+        )
 
     async def stop(self) -> None:
-        if not self._worker_tasks:
+        if self._dispatcher is None:
             return
-        self._shutdown_event.set()
-        for task in self._worker_tasks:
+        tasks = [self._dispatcher, *self._job_tasks]
+        if self._progress_flusher is not None:
+            tasks.append(self._progress_flusher)
+        for task in tasks:
             task.cancel()
-        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
-        self._worker_tasks.clear()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._dispatcher = None
+        self._progress_flusher = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
         await self.notifier.close()
-        self.transcoder.shutdown()
+        await self.transcoder.shutdown()
         logger.info("Download manager stopped")
 
     async def enqueue_job(self, job_id: str) -> None:
         await self.queue.put(job_id)
         logger.debug("Job %s queued", job_id)
 
-    async def _worker(self, worker_id: int) -> None:
-        logger.debug("Worker %d started", worker_id)
-        while not self._shutdown_event.is_set():
-            try:
-                job_id = await asyncio.wait_for(self.queue.get(), timeout=1.0)
-            except asyncio.TimeoutError:
-                continue
-            try:
-                logger.debug("Worker %d processing job %s", worker_id, job_id)
-                await self._execute_job(job_id)
-            except Exception as exc:  # pragma: no cover - defensive logging
-                logger.exception("Worker %d: Job %s failed with unexpected error", worker_id, job_id)
-                self._mark_failed(job_id, str(exc))
-            finally:
-                self.queue.task_done()
-        logger.debug("Worker %d stopped", worker_id)
+    async def _dispatch(self) -> None:
+        """Start a task per queued job as soon as a download slot is free."""
+
+        while True:
+            job_id = await self.queue.get()
+            await self._slots.acquire()
+            task = asyncio.create_task(self._run_job(job_id))
+            self._job_tasks.add(task)
+            task.add_done_callback(self._job_tasks.discard)
+
+    async def _run_job(self, job_id: str) -> None:
+        try:
+            logger.debug("Processing job %s", job_id)
+            await self._execute_job(job_id)
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.exception("Job %s failed with unexpected error", job_id)
+            self._mark_failed(job_id, str(exc))
+        finally:
+            self._slots.release()
+            self.queue.task_done()
 
     async def _execute_job(self, job_id: str) -> None:
         with get_session() as session:
-            job = session.get(DownloadJob, job_id)
+            job = session.get(DownloadJob, job_id, options=_SKIP_MANIFEST)
             if job is None:
                 logger.warning("Job %s disappeared before execution", job_id)
                 return
@@ -181,14 +233,16 @@ class DownloadManager:
         await self._notify_started(job_ctx)
 
         try:
-            result = await asyncio.to_thread(self._run_download, job_ctx)
+            result = await self._loop.run_in_executor(
+                self._executor, self._run_download, job_ctx
+            )
         except Exception as exc:
             self._mark_failed(job_id, str(exc))
             await self._notify_failure(job_id, str(exc))
             return
 
         with get_session() as session:
-            db_job = session.get(DownloadJob, job_id)
+            db_job = session.get(DownloadJob, job_id, options=_SKIP_MANIFEST)
             if db_job is None:
                 return
             db_job.status = JobStatus.completed
@@ -203,84 +257,115 @@ class DownloadManager:
         self.transcoder.schedule_manifest(job_id, result.manifest)
 
     def _run_download(self, job: JobContext) -> DownloadResult:
-        dest_dir = (self.settings.download_root / f"{job.id}").resolve()
+        # download_root is resolved in get_settings() and job ids are hex, so
+        # the destination is already canonical.
+        dest_dir = self.settings.download_root / job.id
         if dest_dir.exists():
             shutil.rmtree(dest_dir)
         dest_dir.mkdir(parents=True, exist_ok=True)
-        progress_hook = self._build_progress_hook(job.id)
+        ydl = self._thread_ydl()
         outtmpl = str(dest_dir / "%(title).200B_%(id)s.%(ext)s")
-        ydl_opts = {
-            "outtmpl": outtmpl,
-            "writedescription": True,
-            "writesubtitles": True,
-            "writeautomaticsub": True,
-            "writethumbnail": True,
-            "write_all_thumbnails": True,
-            "progress_hooks": [progress_hook],
-            "paths": {"home": str(dest_dir)},
-        }
-
-        if self.settings.ytdlp_cookie_file:
-            cookie_file = self.settings.ytdlp_cookie_file
-            if not cookie_file.exists():
-                logger.warning("yt-dlp cookie file %s not found", cookie_file)
-            else:
-                ydl_opts["cookiefile"] = str(cookie_file)
+        ydl.params["outtmpl"]["default"] = outtmpl
+        ydl.params["paths"] = {"home": str(dest_dir)}
+        self._ydl_local.progress_hook = self._build_progress_hook(job)
+        # Start every job from the cookie file alone so cookies picked up by
+        # the previous download on this thread do not carry over.
+        ydl.cookiejar.clear()
+        if ydl.params.get("cookiefile"):
+            ydl.cookiejar.load()
 
         logger.info("Starting download for job %s", job.id)
-        with YoutubeDL(ydl_opts) as ydl:
+        try:
             info = ydl.extract_info(job.source_url, download=True)
+        finally:
+            ydl.save_cookies()
 
         _dedupe_thumbnails(info)
         metadata_filename = "metadata.json"
         metadata_path = dest_dir / metadata_filename
-        metadata_json = json.dumps(info, indent=2, default=_json_default)
-        metadata_path.write_text(metadata_json, encoding="utf-8")
+        with metadata_path.open("w", encoding="utf-8") as fp:
+            json.dump(info, fp, indent=2, default=_json_default)
 
         description_filename = "description.txt"
         description_path = dest_dir / description_filename
+        # dest_dir was recreated empty above, so there is no stale file to
+        # remove when the video has no description.
         has_description = bool(info.get("description"))
         if has_description:
             description_path.write_text(info["description"], encoding="utf-8")
-        else:
-            if description_path.exists():
-                description_path.unlink()
 
         final_dir = self._rename_download_directory(dest_dir, info.get("title"), job.id)
 
-        manifest = [
-            str(path.relative_to(self.settings.download_root))
-            for path in final_dir.rglob("*")
-            if path.is_file()
-        ]
+        # final_dir is a direct child of download_root, so its name is the
+        # relative prefix and plain string joins give the same paths as
+        # Path.relative_to() without a Path object per entry.
+        output_rel = final_dir.name
+        final_str = str(final_dir)
+        manifest: List[str] = []
+        top_level: Set[str] = set()
+        for dirpath, _dirnames, filenames in os.walk(final_str):
+            if dirpath == final_str:
+                rel_dir = output_rel
+                top_level.update(filenames)
+            else:
+                rel_dir = os.path.join(output_rel, dirpath[len(final_str) + 1 :])
+            manifest.extend(os.path.join(rel_dir, name) for name in filenames)
 
         metadata_rel = None
-        metadata_candidate = final_dir / metadata_filename
-        if metadata_candidate.exists():
-            metadata_rel = str(
-                metadata_candidate.relative_to(self.settings.download_root)
-            )
+        if metadata_filename in top_level:
+            metadata_rel = os.path.join(output_rel, metadata_filename)
 
         description_rel = None
-        if has_description:
-            description_candidate = final_dir / description_filename
-            if description_candidate.exists():
-                description_rel = str(
-                    description_candidate.relative_to(self.settings.download_root)
-                )
+        if has_description and description_filename in top_level:
+            description_rel = os.path.join(output_rel, description_filename)
 
         return DownloadResult(
             title=info.get("title"),
-            output_dir=str(final_dir.relative_to(self.settings.download_root)),
+            output_dir=output_rel,
             metadata_path=metadata_rel,
             description_path=description_rel,
             manifest=manifest,
         )
 
+    def _thread_ydl(self) -> YoutubeDL:
+        """Return the calling thread's YoutubeDL, creating it on first use.
+
+        Constructing YoutubeDL registers every extractor, so each download
+        thread keeps one and only the per-job options change between jobs.
+        """
+
+        ydl = getattr(self._ydl_local, "ydl", None)
+        if ydl is not None:
+            return ydl
+        ydl_opts = {
+            "outtmpl": "%(title).200B_%(id)s.%(ext)s",
+            "writesubtitles": True,
+            "writeautomaticsub": True,
+            "writethumbnail": True,
+            "write_all_thumbnails": True,
+            "progress_hooks": [self._thread_progress_hook],
+        }
+
+        if self.settings.ytdlp_cookie_file:
+            cookie_file = self.settings.ytdlp_cookie_file
+            if not cookie_file.exists():
+                logger.warning("yt-dlp cookie file %s not found", cookie_file)
+            else:
+                ydl_opts["cookiefile"] = str(cookie_file)
+
+        ydl = YoutubeDL(ydl_opts)
+        self._ydl_local.ydl = ydl
+        return ydl
+
+    def _thread_progress_hook(self, status: dict) -> None:
+        self._ydl_local.progress_hook(status)
+
     def _recover_incomplete_jobs(self) -> List[str]:
         with get_session() as session:
-            statement = select(DownloadJob).where(
-                DownloadJob.status.in_((JobStatus.pending, JobStatus.running))
+            statement = (
+                select(DownloadJob)
+                .where(DownloadJob.status.in_((JobStatus.pending, JobStatus.running)))
+                .options(*_SKIP_MANIFEST)
             )
             jobs = session.exec(statement).all()
             resumed: List[str] = []
@@ -305,7 +390,7 @@ class DownloadManager:
         for job in jobs:
             self.transcoder.schedule_manifest(job.id, job.file_manifest)
 
-    def _build_progress_hook(self, job_id: str):
+    def _build_progress_hook(self, job: JobContext):
         def hook(status: dict) -> None:
             if status.get("status") != "downloading":
                 return
@@ -314,7 +399,7 @@ class DownloadManager:
             if not downloaded or not total:
                 return
             percent = max(0.0, min(100.0, (downloaded / total) * 100))
-            self._update_progress(job_id, percent)
+            self._update_progress(job, percent)
 
         return hook
 
@@ -332,66 +417,80 @@ class DownloadManager:
         if parent == directory:
             return directory
 
-        def _candidate_name(attempt: int) -> str:
-            if attempt == 0:
-                return safe_name
-            if attempt == 1:
-                return f"{safe_name}-{job_id[:6]}"
-            return f"{safe_name}-{job_id[:6]}-{attempt - 1}"
-
-        for attempt in range(0, 20):
-            name = _candidate_name(attempt)
-            candidate = parent / name
-            if candidate == directory:
-                return directory
-            if candidate.exists():
+        # The job id suffix keeps names unique, so a single rename suffices;
+        # if even that target is taken the download stays under its job id.
+        candidate = parent / f"{safe_name}-{job_id[:8]}"
+        if candidate == directory:
+            return directory
+        try:
+            directory.rename(candidate)
+        except OSError:
+            logger.warning(
+                "Failed to rename download directory %s -> %s",
+                directory,
+                candidate,
+                exc_info=True,
+            )
+            return directory
+        logger.info(
+            "Renamed download directory %s -> %s", directory.name, candidate.name
+        )
+        return candidate
+
+    def _update_progress(self, job: JobContext, percent: float) -> None:
+        with self._progress_lock:
+            self._pending_progress[job.id] = percent
+        checkpoint = self._progress_checkpoints.get(job.id, -100.0)
+        if (
+            job.telegram_chat_id
+            and self._loop
+            and percent - checkpoint >= self.settings.notifier_min_percent_step
+        ):
+            self._progress_checkpoints[job.id] = percent
+            asyncio.run_coroutine_threadsafe(
+                self._push_progress(job.id, percent), self._loop
+            )
+
+    async def _flush_progress_loop(self) -> None:
+        """Write the latest progress of every active job once per second."""
+
+        while True:
+            await asyncio.sleep(1.0)
+            with self._progress_lock:
+                pending, self._pending_progress = self._pending_progress, {}
+            if not pending:
                 continue
             try:
-                directory.rename(candidate)
-                logger.info(
-                    "Renamed download directory %s -> %s", directory.name, candidate.name
-                )
-                return candidate
-            except FileExistsError:
-                continue
-            except OSError:
-                logger.warning(
-                    "Failed to rename download directory %s -> %s",
-                    directory,
-                    candidate,
-                    exc_info=True,
-                )
-                return directory
-
-        logger.warning(
-            "Unable to find unique directory name for %s after multiple attempts",
-            directory,
+                await asyncio.to_thread(self._write_progress, pending)
+            except Exception:  # pragma: no cover - defensive logging
+                logger.exception("Failed to flush download progress")
+
+    def _write_progress(self, pending: Dict[str, float]) -> None:
+        # Only running jobs are touched, so a late flush can never overwrite
+        # the final state written when a job completes or fails.
+        table = DownloadJob.__table__
+        statement = (
+            update(table)
+            .where(
+                table.c.id == bindparam("job_id"),
+                table.c.status == JobStatus.running,
+            )
+            .values(progress=bindparam("percent"), updated_at=now_utc())
         )
-        return directory
-
-    def _update_progress(self, job_id: str, percent: float) -> None:
         with get_session() as session:
-            job = session.get(DownloadJob, job_id)
-            if not job:
-                return
-            job.progress = percent
-            job.touch()
-            checkpoint = self._progress_checkpoints.get(job_id, -100.0)
-            if (
-                job.telegram_chat_id
-                and self._loop
-                and percent - checkpoint >= self.settings.notifier_min_percent_step
-            ):
-                self._progress_checkpoints[job_id] = percent
-                asyncio.run_coroutine_threadsafe(
-                    self._push_progress(job.id, percent), self._loop
-                )
+            session.execute(
+                statement,
+                [
+                    {"job_id": job_id, "percent": percent}
+                    for job_id, percent in pending.items()
+                ],
+            )
 
     async def _push_progress(self, job_id: str, percent: float) -> None:
         if not self.notifier.bot_token:
             return
         with get_session() as session:
-            job = session.get(DownloadJob, job_id)
+            job = session.get(DownloadJob, job_id, options=_SKIP_MANIFEST)
             if not job or not job.telegram_chat_id:
                 return
             message = f"Download update ({percent:.0f}%): {job.title or job.source_url}"
@@ -408,7 +507,7 @@ class DownloadManager:
 
     def _mark_failed(self, job_id: str, error: str) -> None:
         with get_session() as session:
-            job = session.get(DownloadJob, job_id)
+            job = session.get(DownloadJob, job_id, options=_SKIP_MANIFEST)
             if not job:
                 return
             job.status = JobStatus.failed
@@ -422,7 +521,7 @@ class DownloadManager:
         message_id = await self.notifier.send_message(job_ctx.telegram_chat_id, message)
         if message_id:
             with get_session() as session:
-                job = session.get(DownloadJob, job_ctx.id)
+                job = session.get(DownloadJob, job_ctx.id, options=_SKIP_MANIFEST)
                 if job:
                     job.telegram_message_id = message_id
 
@@ -430,7 +529,7 @@ class DownloadManager:
         if not self.notifier.bot_token:
             return
         with get_session() as session:
-            job = session.get(DownloadJob, job_id)
+            job = session.get(DownloadJob, job_id, options=_SKIP_MANIFEST)
             if not job or not job.telegram_chat_id:
                 return
             link_hint = ""
@@ -448,7 +547,7 @@ class DownloadManager:
         if not self.notifier.bot_token:
             return
         with get_session() as session:
-            job = session.get(DownloadJob, job_id)
+            job = session.get(DownloadJob, job_id, options=_SKIP_MANIFEST)
             if not job or not job.telegram_chat_id:
                 return
             text = f"❌ Download failed: {job.source_url}\n{error}"
@@ -460,15 +559,16 @@ class DownloadManager:
                 await self.notifier.send_message(job.telegram_chat_id, text)
 
 
-def is_url_allowed(url: str) -> bool:
+def is_host_allowed(hostname: str | None) -> bool:
+    """Return True if the host or one of its parent domains is allowlisted."""
+
     settings = get_settings()
-    if not settings.allowed_source_domains:
+    if not settings.allowed_domains:
         return True
-    hostname = urlparse(url).hostname or ""
-    hostname = hostname.lower()
-    return any(
-        hostname.endswith(domain.lower()) for domain in settings.allowed_source_domains
+    host = (hostname or "").lower()
+    return host in settings.allowed_domains or host.endswith(
+        settings.allowed_domain_suffixes
     )
 
 
-__all__ = ["DownloadManager", "is_url_allowed"]
+__all__ = ["DownloadManager", "is_host_allowed"]
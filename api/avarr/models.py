@@ -5,21 +5,57 @@ from __future__ import annotations
 import enum
 import json
 import uuid
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Sequence
 
-from sqlalchemy import Column, JSON
+from sqlalchemy import Column, Index, Text
+from sqlalchemy.types import TypeDecorator
 from sqlmodel import Field, SQLModel
 
 
-def _now() -> datetime:
-    return datetime.utcnow()
+def now_utc() -> datetime:
+    """Return the current UTC time as the naive datetime stored on jobs."""
+
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
 def _uuid() -> str:
     return uuid.uuid4().hex
 
 
+class PathList(TypeDecorator):
+    """Store a list of relative paths as newline-separated TEXT.
+
+    Joining and splitting is cheaper than JSON encoding for large manifests.
+    yt-dlp strips newlines from the filenames it writes, so the separator
+    never occurs inside an entry.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(
+        self, value: Optional[List[str]], dialect: Any
+    ) -> Optional[str]:
+        if value is None:
+            return None
+        return "\n".join(value)
+
+    def process_result_value(self, value: Optional[str], dialect: Any) -> List[str]:
+        if not value:
+            return []
+        if value[0] == "[" or value == "null":
+            # Rows written before migration 005 still hold a JSON array.
+            try:
+                legacy = json.loads(value)
+            except ValueError:
+                pass
+            else:
+                if legacy is None or isinstance(legacy, list):
+                    return legacy or []
+        return value.split("\n")
+
+
 class JobStatus(str, enum.Enum):
     pending = "pending"
     running = "running"
@@ -29,30 +65,48 @@ class JobStatus(str, enum.Enum):
 
 class DownloadJob(SQLModel, table=True):
     id: str = Field(default_factory=_uuid, primary_key=True, index=True)
-    source_url: str = Field(index=True)
+    source_url: str
     status: JobStatus = Field(default=JobStatus.pending)
     progress: float = Field(default=0.0, ge=0.0, le=100.0)
     title: Optional[str] = None
     output_dir: Optional[str] = None
     metadata_path: Optional[str] = None
     description_path: Optional[str] = None
-    file_manifest: List[str] = Field(default_factory=list, sa_column=Column(JSON))
+    file_manifest: List[str] = Field(default_factory=list, sa_column=Column(PathList))
     error: Optional[str] = None
     telegram_chat_id: Optional[int] = Field(default=None, index=True)
     telegram_message_id: Optional[int] = None
     watched: bool = Field(default=False, index=True)
-    starred: bool = Field(default=False, index=True)
-    created_at: datetime = Field(default_factory=_now)
-    updated_at: datetime = Field(default_factory=_now)
+    starred: bool = Field(default=False)
+    created_at: datetime = Field(default_factory=now_utc)
+    updated_at: datetime = Field(default_factory=now_utc)
 
     def touch(self) -> None:
-        self.updated_at = _now()
+        self.updated_at = now_utc()
 
     def set_manifest(self, manifest: List[str]) -> None:
         self.file_manifest = manifest
         self.touch()
 
 
+# One job per source URL; inserts rely on this to detect duplicates.
+Index("ix_downloadjob_source_url_unique", DownloadJob.source_url, unique=True)
+
+# Serve the default list_jobs ordering straight from an index, with or without
+# a status filter, and keep the starred view small via a partial index.
+Index("ix_downloadjob_created_at", DownloadJob.created_at.desc())
+Index(
+    "ix_downloadjob_status_created",
+    DownloadJob.status,
+    DownloadJob.created_at.desc(),
+)
+Index(
+    "ix_downloadjob_starred_partial",
+    DownloadJob.created_at.desc(),
+    sqlite_where=DownloadJob.starred == True,  # noqa: E712
+)
+
+
 class JobCreate(SQLModel):
     url: str
     telegram_chat_id: Optional[int] = None
@@ -75,10 +129,15 @@ class JobRead(SQLModel):
     created_at: datetime
     updated_at: datetime
 
+    @classmethod
+    def from_job_tuple(cls, row: Sequence[Any]) -> "JobRead":
+        """Build from trusted column values ordered like ``model_fields``."""
+
+        return cls.model_construct(**dict(zip(cls.model_fields, row)))
+
     @classmethod
     def from_orm(cls, job: DownloadJob) -> "JobRead":
-        data = json.loads(job.model_dump_json())
-        return cls(**data)
+        return cls.model_validate(job, from_attributes=True)
 
 
 class JobDeleteResponse(SQLModel):
@@ -98,4 +157,5 @@ __all__ = [
     "JobStatus",
     "JobDeleteResponse",
     "JobUpdateFlags",
+    "now_utc",
 ]
@@ -7,6 +7,9 @@ from typing import Optional
 import httpx
 
 
+_TELEGRAM_API_BASE = "https://api.telegram.org"
+
+
 class TelegramNotifier:
     """Send messages to Telegram chats if a bot token is configured."""
 
@@ -16,7 +19,19 @@ class TelegramNotifier:
 
     async def start(self) -> None:
         if self.bot_token and not self._client:
-            self._client = httpx.AsyncClient(timeout=30)
+            # Progress edits hit the same host about once a second per job;
+            # one multiplexed, kept-alive connection avoids a TLS handshake
+            # for each of them.
+            self._client = httpx.AsyncClient(
+                base_url=_TELEGRAM_API_BASE,
+                timeout=30,
+                http2=True,
+                limits=httpx.Limits(
+                    max_keepalive_connections=20,
+                    max_connections=50,
+                    keepalive_expiry=60.0,
+                ),
+            )
 
     async def close(self) -> None:
         if self._client:
@@ -51,7 +66,7 @@ class TelegramNotifier:
         response.raise_for_status()
 
     def _api_url(self, method: str) -> str:
-        return f"https://api.telegram.org/bot{self.bot_token}/{method}"
+        return f"/bot{self.bot_token}/{method}"
 
 
 __all__ = ["TelegramNotifier"]
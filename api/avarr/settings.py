@@ -2,9 +2,9 @@
 
 from __future__ import annotations
 
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import FrozenSet, List, Optional, Tuple
 
 from pydantic import Field, HttpUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -21,6 +21,18 @@ class Settings(BaseSettings):
         default=Path("/home/jacob/Downloads/avarr"),
         description="Folder where assets are stored",
     )
+    follow_symlinks: bool = Field(
+        default=False,
+        description="Resolve symlinks when checking that deleted paths stay inside download_root",
+    )
+    serve_downloads_directly: bool = Field(
+        default=True,
+        description="Mount download_root under /downloads; disable when a reverse proxy serves it",
+    )
+    downloads_accel_redirect: Optional[str] = Field(
+        default=None,
+        description="nginx internal location used to stream /downloads via X-Accel-Redirect",
+    )
     telegram_bot_token: Optional[str] = Field(
         default=None, description="Bot token used for sending Telegram updates"
     )
@@ -41,10 +53,10 @@ class Settings(BaseSettings):
         description="Minimum percentage delta before pushing Telegram progress updates",
     )
     max_concurrent_downloads: int = Field(
-        default=1,
+        default=8,
         ge=1,
-        le=10,
-        description="Maximum number of simultaneous downloads (1-10)",
+        le=64,
+        description="Maximum number of simultaneous downloads (1-64)",
     )
     transcode_workers: int = Field(
         default=1,
@@ -59,6 +71,19 @@ class Settings(BaseSettings):
 
     model_config = SettingsConfigDict(env_prefix="AVARR_")
 
+    @cached_property
+    def allowed_domains(self) -> FrozenSet[str]:
+        """Normalized ``allowed_source_domains`` for exact hostname lookups."""
+
+        domains = (d.strip().strip(".").lower() for d in self.allowed_source_domains)
+        return frozenset(domain for domain in domains if domain)
+
+    @cached_property
+    def allowed_domain_suffixes(self) -> Tuple[str, ...]:
+        """``.domain`` suffixes matching subdomains of the allowed domains."""
+
+        return tuple(f".{domain}" for domain in self.allowed_domains)
+
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
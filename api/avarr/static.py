@@ -0,0 +1,60 @@
+"""Static file mounts tuned for serving large downloads."""
+
+from __future__ import annotations
+
+import os
+from urllib.parse import quote
+
+from fastapi.staticfiles import StaticFiles
+from starlette.responses import Response
+from starlette.types import Scope
+
+
+class AccelRedirectStaticFiles(StaticFiles):
+    """Hand file bodies to a fronting nginx via ``X-Accel-Redirect``.
+
+    The app still resolves and validates the path, but nginx streams the file
+    with ``sendfile`` from the internal location named by ``redirect_prefix``.
+    """
+
+    def __init__(self, *, directory: str | os.PathLike[str], redirect_prefix: str) -> None:
+        super().__init__(directory=directory)
+        self.redirect_prefix = redirect_prefix.rstrip("/")
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        relative = os.path.relpath(full_path, self.directory)
+        target = f"{self.redirect_prefix}/{quote(relative.replace(os.sep, '/'))}"
+        return Response(status_code=status_code, headers={"X-Accel-Redirect": target})
+
+
+class SPAStaticFiles(StaticFiles):
+    """Serve the built web UI, letting browsers keep hashed assets forever.
+
+    Vite fingerprints everything under ``assets/``, so those files never change
+    in place; ``index.html`` and other entry points must always be revalidated.
+    """
+
+    immutable_prefix = "assets" + os.sep
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike[str],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if self.get_path(scope).startswith(self.immutable_prefix):
+            response.headers["cache-control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["cache-control"] = "no-cache"
+        return response
+
+
+__all__ = ["AccelRedirectStaticFiles", "SPAStaticFiles"]
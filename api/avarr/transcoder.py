@@ -2,11 +2,11 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
-import subprocess
-from concurrent.futures import ThreadPoolExecutor
+import os
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, List
 
 from .database import get_session
 from .models import DownloadJob
@@ -22,17 +22,33 @@ VIDEO_EXTENSIONS = {
     ".m4v",
 }
 
+# Only the end of ffmpeg's log is kept; it holds the error on failure.
+_STDERR_TAIL_BYTES = 8192
+
+
+async def _read_tail(stream: asyncio.StreamReader, limit: int) -> bytes:
+    """Drain ``stream`` and return at most its last ``limit`` bytes."""
+
+    tail = bytearray()
+    while chunk := await stream.read(65536):
+        tail += chunk
+        if len(tail) > limit:
+            del tail[:-limit]
+    return bytes(tail)
+
 
 class TranscodeService:
-    """Schedule ffmpeg jobs without blocking the asyncio event loop."""
+    """Run ffmpeg as asyncio subprocesses, at most ``max_workers`` at a time."""
 
     def __init__(self, download_root: Path, max_workers: int = 1) -> None:
         self._download_root = download_root.resolve()
-        self._executor = ThreadPoolExecutor(
-            max_workers=max_workers, thread_name_prefix="transcode"
-        )
+        self._semaphore = asyncio.Semaphore(max_workers)
         self._logger = logging.getLogger(__name__)
         self._inflight: set[str] = set()
+        self._tasks: set[asyncio.Task[None]] = set()
+        # Manifest updates are read-modify-write; concurrent ones would
+        # overwrite each other's entries.
+        self._manifest_lock = asyncio.Lock()
 
     def schedule_manifest(self, job_id: str, manifest: Iterable[str]) -> None:
         if not manifest:
@@ -40,8 +56,11 @@ class TranscodeService:
         for relative_path in manifest:
             self._maybe_submit(job_id, relative_path)
 
-    def shutdown(self, wait: bool = True) -> None:
-        self._executor.shutdown(wait=wait, cancel_futures=True)
+    async def shutdown(self) -> None:
+        tasks: List[asyncio.Task[None]] = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
     def _maybe_submit(self, job_id: str, relative_path: str) -> None:
         normalized = relative_path.strip()
@@ -50,14 +69,27 @@ class TranscodeService:
         if normalized in self._inflight:
             return
         self._inflight.add(normalized)
-        future = self._executor.submit(self._transcode_file, job_id, normalized)
-        future.add_done_callback(lambda _: self._inflight.discard(normalized))
+        task = asyncio.create_task(self._run_limited(job_id, normalized))
+        self._tasks.add(task)
+
+        def _done(finished: asyncio.Task[None]) -> None:
+            self._tasks.discard(finished)
+            self._inflight.discard(normalized)
+
+        task.add_done_callback(_done)
+
+    async def _run_limited(self, job_id: str, relative_path: str) -> None:
+        async with self._semaphore:
+            try:
+                await self._transcode_file(job_id, relative_path)
+            except Exception:  # pragma: no cover - defensive logging
+                self._logger.exception("Transcode of %s failed", relative_path)
 
     def _needs_transcode(self, relative_path: str) -> bool:
-        extension = Path(relative_path).suffix.lower()
-        return bool(extension) and extension in VIDEO_EXTENSIONS
+        extension = os.path.splitext(relative_path)[1].lower()
+        return extension in VIDEO_EXTENSIONS
 
-    def _transcode_file(self, job_id: str, relative_path: str) -> None:
+    async def _transcode_file(self, job_id: str, relative_path: str) -> None:
         source = (self._download_root / relative_path).resolve()
         try:
             source.relative_to(self._download_root)
@@ -84,12 +116,30 @@ class TranscodeService:
         ]
 
         try:
-            subprocess.run(cmd, check=True, capture_output=True, text=True)
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
         except FileNotFoundError:
             self._logger.error("ffmpeg binary not found while transcoding %s", source)
             return
-        except subprocess.CalledProcessError as exc:
-            self._logger.error("ffmpeg failed for %s: %s", source, exc.stderr)
+        try:
+            stderr_tail = await _read_tail(proc.stderr, _STDERR_TAIL_BYTES)
+            await proc.wait()
+        except asyncio.CancelledError:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            if destination.exists():
+                destination.unlink()
+            raise
+        if proc.returncode != 0:
+            self._logger.error(
+                "ffmpeg failed for %s: %s",
+                source,
+                stderr_tail.decode("utf-8", "replace"),
+            )
             if destination.exists():
                 destination.unlink()
             return
@@ -100,6 +150,15 @@ class TranscodeService:
             pass
 
         new_relative = str(destination.relative_to(self._download_root))
+        async with self._manifest_lock:
+            await asyncio.to_thread(
+                self._replace_manifest_entry, job_id, relative_path, new_relative
+            )
+        self._logger.info("Transcoded %s -> %s", relative_path, new_relative)
+
+    def _replace_manifest_entry(
+        self, job_id: str, relative_path: str, new_relative: str
+    ) -> None:
         with get_session() as session:
             job = session.get(DownloadJob, job_id)
             if not job:
@@ -108,7 +167,6 @@ class TranscodeService:
             if new_relative not in manifest:
                 manifest.append(new_relative)
             job.set_manifest(manifest)
-        self._logger.info("Transcoded %s -> %s", relative_path, new_relative)
 
 
 __all__ = ["TranscodeService", "VIDEO_EXTENSIONS"]
@@ -0,0 +1,13 @@
+-- Migration: Add indexes for the job list ordering
+-- Date: 2026-10-15
+-- Description: Adds created_at ordering indexes and a partial index for starred jobs
+
+-- Serve "ORDER BY created_at DESC", optionally filtered by status, without a sort step
+CREATE INDEX IF NOT EXISTS ix_downloadjob_created_at ON downloadjob (created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_downloadjob_status_created ON downloadjob (status, created_at DESC);
+
+-- Starred jobs are a small subset; index only those rows
+CREATE INDEX IF NOT EXISTS ix_downloadjob_starred_partial ON downloadjob (created_at DESC) WHERE starred = 1;
+
+-- Superseded by the partial index above
+DROP INDEX IF EXISTS ix_downloadjob_starred;
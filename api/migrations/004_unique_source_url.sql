@@ -0,0 +1,10 @@
+-- Migration: Enforce one job per source URL
+-- Date: 2026-10-15
+-- Description: Replaces the source_url lookup index with a unique index
+
+-- Fails if duplicates exist; list them with:
+--   SELECT source_url FROM downloadjob GROUP BY source_url HAVING COUNT(*) > 1;
+CREATE UNIQUE INDEX IF NOT EXISTS ix_downloadjob_source_url_unique ON downloadjob (source_url);
+
+-- Superseded by the unique index above
+DROP INDEX IF EXISTS ix_downloadjob_source_url;
@@ -0,0 +1,14 @@
+-- Migration: Store file manifests as newline-separated text
+-- Date: 2026-10-15
+-- Description: Converts file_manifest from a JSON array to paths joined by "\n"
+
+-- Rows that are no longer JSON arrays were already converted and are skipped
+UPDATE downloadjob
+SET file_manifest = COALESCE(
+    (
+        SELECT group_concat(value, char(10))
+        FROM (SELECT value FROM json_each(downloadjob.file_manifest) ORDER BY key)
+    ),
+    ''
+)
+WHERE json_valid(file_manifest) AND json_type(file_manifest) IN ('array', 'null');
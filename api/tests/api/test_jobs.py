@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from avarr.api import jobs
+from avarr.api.jobs import _resolve_download_path
+from avarr.models import DownloadJob
+
+
+def _add_jobs(session: Session, count: int, created_at: datetime) -> list[str]:
+    jobs = [
+        DownloadJob(
+            source_url=f"https://example.com/{created_at:%Y%m%d%H%M%S}/{index}",
+            created_at=created_at,
+        )
+        for index in range(count)
+    ]
+    session.add_all(jobs)
+    session.commit()
+    return [job.id for job in jobs]
+
+
+def test_resolve_download_path_joins_relative_entry(download_root: Path) -> None:
+    assert _resolve_download_path("show/ep1.mp4") == download_root / "show" / "ep1.mp4"
+    assert _resolve_download_path(" show/./a/../ep1.mp4 ") == (
+        download_root / "show" / "ep1.mp4"
+    )
+
+
+@pytest.mark.parametrize(
+    "entry", ["..", "../etc/passwd", "show/../../etc/passwd", "a/../../../b"]
+)
+def test_resolve_download_path_rejects_parent_escape(entry: str) -> None:
+    assert _resolve_download_path(entry) is None
+
+
+@pytest.mark.parametrize("entry", ["/etc/passwd", "//etc/passwd", "\\etc/passwd"])
+def test_resolve_download_path_keeps_absolute_entries_under_root(
+    entry: str, download_root: Path
+) -> None:
+    assert _resolve_download_path(entry) == download_root / "etc" / "passwd"
+
+
+@pytest.mark.parametrize("entry", ["", "   ", ".", "./", "/", "show/.."])
+def test_resolve_download_path_rejects_root_itself(entry: str) -> None:
+    assert _resolve_download_path(entry) is None
+
+
+def test_resolve_download_path_rejects_sibling_prefix_directory(
+    download_root: Path,
+) -> None:
+    sibling = f"../{download_root.name}-evil/x"
+
+    assert _resolve_download_path(sibling) is None
+
+
+@pytest.fixture
+def escape_link(download_root: Path, tmp_path: Path):
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    link = download_root / "escape-link"
+    link.symlink_to(outside, target_is_directory=True)
+    yield link
+    link.unlink()
+
+
+def test_resolve_download_path_symlink_out_of_root_accepted_when_follow_symlinks_disabled(
+    escape_link: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # The default only normalizes the string, so cleanup can reach through a
+    # symlinked directory; see "Deleting Jobs" in the README.
+    monkeypatch.setattr(jobs.settings, "follow_symlinks", False)
+
+    assert _resolve_download_path("escape-link/file.mp4") == escape_link / "file.mp4"
+
+
+def test_resolve_download_path_symlink_out_of_root_rejected_when_follow_symlinks_enabled(
+    escape_link: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(jobs.settings, "follow_symlinks", True)
+
+    assert _resolve_download_path("escape-link/file.mp4") is None
+
+
+def test_resolve_download_path_follows_symlink_inside_root(
+    download_root: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    target = download_root / "real"
+    target.mkdir(exist_ok=True)
+    link = download_root / "inside-link"
+    link.symlink_to(target, target_is_directory=True)
+    monkeypatch.setattr(jobs.settings, "follow_symlinks", True)
+    try:
+        assert _resolve_download_path("inside-link/file.mp4") == target / "file.mp4"
+    finally:
+        link.unlink()
+
+
+def test_list_jobs_orders_newest_first(client: TestClient, db_session: Session) -> None:
+    start = datetime(2025, 1, 1)
+    older = _add_jobs(db_session, 1, start)
+    newer = _add_jobs(db_session, 1, start + timedelta(seconds=1))
+
+    response = client.get("/jobs/")
+
+    assert response.status_code == 200
+    assert [job["id"] for job in response.json()] == newer + older
+
+
+def test_list_jobs_keyset_pages_cover_every_job_once(
+    client: TestClient, db_session: Session
+) -> None:
+    # Identical timestamps force the id tie-break to keep pages disjoint.
+    expected = sorted(_add_jobs(db_session, 5, datetime(2025, 1, 1)), reverse=True)
+
+    seen: list[str] = []
+    params: dict[str, str | int] = {"limit": 2}
+    while True:
+        page = client.get("/jobs/", params=params).json()
+        seen.extend(job["id"] for job in page)
+        if len(page) < 2:
+            break
+        if len(seen) == 2:
+            # A job inserted mid-scan sorts first and must not shift later pages.
+            _add_jobs(db_session, 1, datetime(2025, 1, 2))
+        params = {
+            "limit": 2,
+            "before_created_at": page[-1]["created_at"],
+            "before_id": page[-1]["id"],
+        }
+
+    assert seen == expected
+
+
+def test_list_jobs_rejects_partial_cursor(client: TestClient) -> None:
+    response = client.get("/jobs/", params={"before_id": "abc"})
+
+    assert response.status_code == 400
+
+
+def test_create_job_queues_new_url(client: TestClient, manager) -> None:
+    response = client.post("/jobs/", json={"url": "https://example.com/new"})
+
+    assert response.status_code == 201
+    assert manager.queued == [response.json()["id"]]
+
+
+def test_create_job_duplicate_url_returns_409(client: TestClient, manager) -> None:
+    first = client.post("/jobs/", json={"url": "https://example.com/dup"})
+    second = client.post("/jobs/", json={"url": "https://example.com/dup"})
+
+    assert first.status_code == 201
+    assert second.status_code == 409
+    assert first.json()["id"] in second.json()["detail"]
+    assert manager.queued == [first.json()["id"]]
+
+
+def test_update_job_flags_returns_updated_job(
+    client: TestClient, db_session: Session
+) -> None:
+    (job_id,) = _add_jobs(db_session, 1, datetime(2025, 1, 1))
+
+    response = client.patch(f"/jobs/{job_id}/flags", json={"watched": True})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] == job_id
+    assert (body["watched"], body["starred"]) == (True, False)
+    assert body["file_manifest"] == []
+    assert body["updated_at"] > body["created_at"]
+    assert client.get(f"/jobs/{job_id}").json() == body
+
+
+def test_update_job_flags_starring_marks_watched(
+    client: TestClient, db_session: Session
+) -> None:
+    (job_id,) = _add_jobs(db_session, 1, datetime(2025, 1, 1))
+
+    starred = client.patch(f"/jobs/{job_id}/flags", json={"starred": True}).json()
+    unstarred = client.patch(f"/jobs/{job_id}/flags", json={"starred": False}).json()
+
+    assert (starred["watched"], starred["starred"]) == (True, True)
+    assert (unstarred["watched"], unstarred["starred"]) == (True, False)
+
+
+def test_update_job_flags_unknown_job_returns_404(client: TestClient) -> None:
+    response = client.patch("/jobs/missing/flags", json={"watched": True})
+
+    assert response.status_code == 404
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import APIRouter, FastAPI, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from avarr.api.routing import ORJSONRequest, ORJSONRoute
+
+
+class Payload(BaseModel):
+    url: str
+    count: int = 0
+
+
+@pytest.fixture
+def client() -> TestClient:
+    router = APIRouter(route_class=ORJSONRoute)
+
+    @router.post("/echo")
+    async def echo(payload: Payload) -> Payload:
+        return payload
+
+    @router.post("/raw")
+    async def raw(request: Request) -> dict:
+        return {"type": type(request).__name__, "body": await request.json()}
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_orjson_route_parses_valid_body(client: TestClient) -> None:
+    response = client.post("/echo", json={"url": "https://example.com/ü", "count": 2})
+
+    assert response.status_code == 200
+    assert response.json() == {"url": "https://example.com/ü", "count": 2}
+
+
+def test_orjson_route_malformed_json_returns_422(client: TestClient) -> None:
+    response = client.post(
+        "/echo",
+        content=b'{"url": "https://example.com",',
+        headers={"content-type": "application/json"},
+    )
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "json_invalid"
+
+
+def test_orjson_route_validation_error_returns_422(client: TestClient) -> None:
+    response = client.post("/echo", json={"count": "many"})
+
+    assert response.status_code == 422
+
+
+def test_orjson_route_hands_handlers_orjson_request(client: TestClient) -> None:
+    response = client.post("/raw", json={"a": [1, 2]})
+
+    assert response.json() == {"type": ORJSONRequest.__name__, "body": {"a": [1, 2]}}
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+
+def _update(text: str, chat_id: int = 42) -> dict:
+    return {"message": {"text": text, "chat": {"id": chat_id}}}
+
+
+def test_telegram_webhook_queues_url(client: TestClient, manager) -> None:
+    response = client.post("/telegram/webhook", json=_update("https://example.com/v"))
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["ok"] is True
+    assert manager.queued == [body["job_id"]]
+
+
+def test_telegram_webhook_duplicate_url_returns_existing_job(
+    client: TestClient, manager
+) -> None:
+    first = client.post("/telegram/webhook", json=_update("https://example.com/v"))
+    second = client.post(
+        "/telegram/webhook", json=_update("https://example.com/v extra words", 7)
+    )
+
+    job_id = first.json()["job_id"]
+    assert second.status_code == 202
+    assert second.json() == {"ok": True, "job_id": job_id}
+    assert manager.queued == [job_id]
+
+
+def test_telegram_webhook_ignores_message_without_text(
+    client: TestClient, manager
+) -> None:
+    response = client.post("/telegram/webhook", json={"message": {"chat": {"id": 1}}})
+
+    assert response.json() == {"ok": True}
+    assert manager.queued == []
@@ -0,0 +1,73 @@
+"""Shared fixtures for the avarr test suite."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Settings and the database engine are created when avarr is first imported,
+# so point them at a throwaway directory before any test module imports it.
+_TEST_ROOT = Path(tempfile.mkdtemp(prefix="avarr-tests-"))
+os.environ["AVARR_DOWNLOAD_ROOT"] = str(_TEST_ROOT / "downloads")
+os.environ["AVARR_DATABASE_URL"] = f"sqlite:///{_TEST_ROOT / 'avarr.db'}"
+os.environ.pop("AVARR_ALLOWED_SOURCE_DOMAINS", None)
+os.environ.pop("AVARR_FOLLOW_SYMLINKS", None)
+
+
+@pytest.fixture
+def settings():
+    from avarr.settings import get_settings
+
+    return get_settings()
+
+
+@pytest.fixture
+def download_root(settings) -> Path:
+    return settings.download_root
+
+
+class RecordingManager:
+    """Stand-in for DownloadManager that records queued job ids."""
+
+    def __init__(self) -> None:
+        self.queued: list[str] = []
+
+    async def enqueue_job(self, job_id: str) -> None:
+        self.queued.append(job_id)
+
+
+@pytest.fixture
+def db_session():
+    from sqlmodel import delete
+
+    from avarr.database import SessionLocal, init_db
+    from avarr.models import DownloadJob
+
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.execute(delete(DownloadJob))
+        session.commit()
+        session.close()
+
+
+@pytest.fixture
+def manager() -> RecordingManager:
+    return RecordingManager()
+
+
+@pytest.fixture
+def client(db_session, manager: RecordingManager):
+    from fastapi.testclient import TestClient
+
+    from avarr.app import create_app
+
+    app = create_app()
+    app.state.manager = manager
+    return TestClient(app)
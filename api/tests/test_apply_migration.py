@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from apply_migration import MANIFEST_TO_TEXT
+from avarr.models import PathList
+
+
+@pytest.fixture
+def legacy_db() -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE downloadjob (id TEXT PRIMARY KEY, file_manifest TEXT)")
+    conn.executemany(
+        "INSERT INTO downloadjob VALUES (?, ?)",
+        [
+            ("json", '["d/a.mp4", "d/b.json", "d/c d.vtt"]'),
+            ("empty", "[]"),
+            ("null", "null"),
+            ("text", "d/a.mp4\nd/b.json"),
+        ],
+    )
+    yield conn
+    conn.close()
+
+
+def _manifests(conn: sqlite3.Connection) -> dict[str, str]:
+    return dict(conn.execute("SELECT id, file_manifest FROM downloadjob"))
+
+
+def test_manifest_to_text_converts_legacy_rows(legacy_db: sqlite3.Connection) -> None:
+    converted = legacy_db.execute(MANIFEST_TO_TEXT).rowcount
+
+    assert converted == 3
+    assert _manifests(legacy_db) == {
+        "json": "d/a.mp4\nd/b.json\nd/c d.vtt",
+        "empty": "",
+        "null": "",
+        "text": "d/a.mp4\nd/b.json",
+    }
+    assert PathList().process_result_value(_manifests(legacy_db)["json"], None) == [
+        "d/a.mp4",
+        "d/b.json",
+        "d/c d.vtt",
+    ]
+
+
+def test_manifest_to_text_is_idempotent(legacy_db: sqlite3.Connection) -> None:
+    legacy_db.execute(MANIFEST_TO_TEXT)
+    before = _manifests(legacy_db)
+
+    assert legacy_db.execute(MANIFEST_TO_TEXT).rowcount == 0
+    assert _manifests(legacy_db) == before
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlmodel import Session
+
+from avarr.database import engine, init_db
+from avarr.models import DownloadJob
+
+UNIQUE_INDEX = "ix_downloadjob_source_url_unique"
+
+
+def _index_names() -> set[str]:
+    return {index["name"] for index in inspect(engine).get_indexes("downloadjob")}
+
+
+def _drop_unique_index(session: Session) -> None:
+    session.execute(text(f"DROP INDEX {UNIQUE_INDEX}"))
+    session.commit()
+
+
+def test_init_db_adds_missing_unique_index(db_session: Session) -> None:
+    _drop_unique_index(db_session)
+    db_session.add(DownloadJob(source_url="https://example.com/a"))
+    db_session.commit()
+
+    init_db()
+
+    assert UNIQUE_INDEX in _index_names()
+
+
+def test_init_db_fails_on_duplicate_source_urls(db_session: Session) -> None:
+    _drop_unique_index(db_session)
+    db_session.add_all(
+        [
+            DownloadJob(source_url="https://example.com/dup"),
+            DownloadJob(source_url="https://example.com/dup"),
+        ]
+    )
+    db_session.commit()
+
+    with pytest.raises(RuntimeError, match="duplicate jobs"):
+        init_db()
+
+    db_session.execute(text("DELETE FROM downloadjob"))
+    db_session.commit()
+    init_db()
+    assert UNIQUE_INDEX in _index_names()
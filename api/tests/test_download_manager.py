@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from typing import Callable
+
+import pytest
+
+from avarr import download_manager
+from avarr.download_manager import is_host_allowed
+from avarr.settings import Settings
+
+
+@pytest.fixture
+def allowlist(monkeypatch: pytest.MonkeyPatch) -> Callable[..., None]:
+    def configure(*domains: str) -> None:
+        settings = Settings(allowed_source_domains=list(domains))
+        monkeypatch.setattr(download_manager, "get_settings", lambda: settings)
+
+    return configure
+
+
+def test_is_host_allowed_exact_host(allowlist: Callable[..., None]) -> None:
+    allowlist("youtube.com")
+
+    assert is_host_allowed("youtube.com")
+    assert not is_host_allowed("vimeo.com")
+
+
+def test_is_host_allowed_subdomain(allowlist: Callable[..., None]) -> None:
+    allowlist("youtube.com")
+
+    assert is_host_allowed("www.youtube.com")
+    assert is_host_allowed("m.music.youtube.com")
+
+
+def test_is_host_allowed_rejects_lookalike_host(allowlist: Callable[..., None]) -> None:
+    allowlist("youtube.com")
+
+    assert not is_host_allowed("evilyoutube.com")
+    assert not is_host_allowed("youtube.com.evil.net")
+
+
+def test_is_host_allowed_normalizes_config_entries(
+    allowlist: Callable[..., None],
+) -> None:
+    allowlist(" YouTube.COM ", ".Vimeo.com", "")
+
+    assert is_host_allowed("youtube.com")
+    assert is_host_allowed("WWW.YOUTUBE.COM")
+    assert is_host_allowed("vimeo.com")
+    assert is_host_allowed("player.vimeo.com")
+    assert not is_host_allowed("")
+
+
+def test_is_host_allowed_none_hostname(allowlist: Callable[..., None]) -> None:
+    allowlist("youtube.com")
+
+    assert not is_host_allowed(None)
+
+
+def test_is_host_allowed_empty_allowlist_allows_all(
+    allowlist: Callable[..., None],
+) -> None:
+    allowlist()
+
+    assert is_host_allowed("example.org")
+    assert is_host_allowed(None)
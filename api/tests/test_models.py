@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import text
+from sqlmodel import Session
+
+from avarr.models import DownloadJob, PathList
+
+
+@pytest.mark.parametrize(
+    "manifest",
+    [[], ["show/ep1.mp4"], ["show/ep1.mp4", "show/ep 2 [x].webm", "show/info.json"]],
+)
+def test_path_list_round_trip(manifest: list[str]) -> None:
+    path_list = PathList()
+
+    stored = path_list.process_bind_param(manifest, None)
+
+    assert path_list.process_result_value(stored, None) == manifest
+
+
+def test_path_list_none() -> None:
+    path_list = PathList()
+
+    assert path_list.process_bind_param(None, None) is None
+    assert path_list.process_result_value(None, None) == []
+
+
+@pytest.mark.parametrize(
+    ("stored", "expected"),
+    [
+        ('["d/a.mp4", "d/b.json"]', ["d/a.mp4", "d/b.json"]),
+        ("[]", []),
+        ("null", []),
+        ("[not json\nd/a.mp4", ["[not json", "d/a.mp4"]),
+    ],
+)
+def test_path_list_reads_legacy_json(stored: str, expected: list[str]) -> None:
+    assert PathList().process_result_value(stored, None) == expected
+
+
+def test_path_list_loads_unmigrated_row(db_session: Session) -> None:
+    job = DownloadJob(source_url="https://example.com/legacy")
+    db_session.add(job)
+    db_session.commit()
+    db_session.execute(
+        text("UPDATE downloadjob SET file_manifest = :manifest WHERE id = :id"),
+        {"manifest": '["d/a.mp4", "d/b.json"]', "id": job.id},
+    )
+    db_session.commit()
+    db_session.expire_all()
+
+    assert db_session.get(DownloadJob, job.id).file_manifest == ["d/a.mp4", "d/b.json"]
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from avarr.static import AccelRedirectStaticFiles, SPAStaticFiles
+
+
+@pytest.fixture
+def accel_client(tmp_path: Path) -> TestClient:
+    served = tmp_path / "served"
+    (served / "My Show").mkdir(parents=True)
+    (served / "My Show" / "ep #1 ü.mp4").write_bytes(b"video")
+    (tmp_path / "secret.txt").write_text("secret")
+    app = FastAPI()
+    app.mount(
+        "/downloads",
+        AccelRedirectStaticFiles(directory=served, redirect_prefix="/internal/"),
+    )
+    return TestClient(app)
+
+
+@pytest.fixture
+def spa_client(tmp_path: Path) -> TestClient:
+    dist = tmp_path / "dist"
+    (dist / "assets").mkdir(parents=True)
+    (dist / "index.html").write_text("<html></html>")
+    (dist / "favicon.ico").write_bytes(b"icon")
+    (dist / "assets" / "app-abc123.js").write_text("console.log(1)")
+    app = FastAPI()
+    app.mount("/", SPAStaticFiles(directory=dist, html=True))
+    return TestClient(app)
+
+
+def test_accel_redirect_percent_encodes_target(accel_client: TestClient) -> None:
+    response = accel_client.get("/downloads/My%20Show/ep%20%231%20%C3%BC.mp4")
+
+    assert response.status_code == 200
+    assert response.headers["x-accel-redirect"] == (
+        "/internal/My%20Show/ep%20%231%20%C3%BC.mp4"
+    )
+    assert response.content == b""
+
+
+def test_accel_redirect_rejects_traversal(accel_client: TestClient) -> None:
+    response = accel_client.get("/downloads/%2E%2E/secret.txt")
+
+    assert response.status_code == 404
+    assert "x-accel-redirect" not in response.headers
+
+
+def test_accel_redirect_missing_file_is_404(accel_client: TestClient) -> None:
+    response = accel_client.get("/downloads/My%20Show/missing.mp4")
+
+    assert response.status_code == 404
+    assert "x-accel-redirect" not in response.headers
+
+
+def test_spa_static_assets_are_immutable(spa_client: TestClient) -> None:
+    response = spa_client.get("/assets/app-abc123.js")
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+
+@pytest.mark.parametrize("path", ["/", "/index.html", "/favicon.ico"])
+def test_spa_static_entry_points_are_no_cache(
+    spa_client: TestClient, path: str
+) -> None:
+    response = spa_client.get(path)
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+
+
+def test_spa_static_not_modified_keeps_cache_control(spa_client: TestClient) -> None:
+    etag = spa_client.get("/assets/app-abc123.js").headers["etag"]
+
+    response = spa_client.get(
+        "/assets/app-abc123.js", headers={"if-none-match": etag}
+    )
+
+    assert response.status_code == 304
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
@@ -37,8 +37,28 @@ async function request<T>(path: string, init?: RequestInit): Promise<T> {
   return response.json()
 }
 
+const LIST_PAGE_SIZE = 500
+
 export async function listJobs(): Promise<Job[]> {
-  return request<Job[]>('/jobs/')
+  // Page by (created_at, id) cursor so jobs added mid-scan cannot shift
+  // rows between pages; dedupe by id in case a page boundary repeats one.
+  const jobs = new Map<string, Job>()
+  let cursor = ''
+  for (;;) {
+    const page = await request<Job[]>(`/jobs/?limit=${LIST_PAGE_SIZE}${cursor}`)
+    for (const job of page) {
+      if (!jobs.has(job.id)) {
+        jobs.set(job.id, job)
+      }
+    }
+    if (page.length < LIST_PAGE_SIZE) {
+      return [...jobs.values()]
+    }
+    const last = page[page.length - 1]
+    cursor =
+      `&before_created_at=${encodeURIComponent(last.created_at)}` +
+      `&before_id=${encodeURIComponent(last.id)}`
+  }
 }
 
 export async function createJob(url: string, telegramChatId?: number): Promise<Job> {